@@ -1,12 +1,19 @@
 import os
 import sys
-import array
+import time
+import heapq
+import hashlib
+import tempfile
+import threading
 import subprocess
+from queue import Empty, SimpleQueue
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import dearpygui.dearpygui as dpg
-from win32api import GetSystemMetrics
+import numpy as np
 
 # Pillow optional
 try:
@@ -19,69 +26,348 @@ except Exception:
 THUMB_SIZE = 192
 THUMB_PADDING = 8
 SIDEBAR_WIDTH = 320
-SUPPORTED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+THUMB_CACHE_DIR = Path.home() / ".cache" / "ai_gallery" / "thumbs"
+THUMB_MAX_INFLIGHT = 32
+GRID_ROW_HEIGHT = THUMB_SIZE + 36
+GRID_PREFETCH_ROWS = 2
+RESIZE_DEBOUNCE_S = 0.15
+VIEWER_MAX_SIZE = (1600, 1000)
+THUMB_TEX_LIMIT = 1024
+PREFETCH_PER_FOLDER = 32
+FULL_CACHE_SIZE = 4
+SCAN_BATCH = 512
+SUPPORTED_EXT = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"})
+# common spellings, matched in C by str.endswith without allocating a lowercased copy
+_EXT_SUFFIXES = (
+    tuple(SUPPORTED_EXT)
+    + tuple(e.upper() for e in SUPPORTED_EXT)
+    + tuple("." + e[1:].capitalize() for e in SUPPORTED_EXT)
+)
 
 state: Dict[str, object] = {
     "root_dir": str(Path.home()),
     "current_dir": str(Path.home()),
     "images_in_dir": [],
-    "thumb_tex": {},
-    "thumb_items": [],
+    "scan_found": [],
+    "scan_gen": 0,
+    "scanning": False,
+    "scan_results": SimpleQueue(),
+    "thumb_tex": OrderedDict(),
+    "thumb_pending": {},
+    "thumb_failed": set(),
+    "thumb_queue": deque(),
+    "thumb_buttons": {},
+    "prefetch_queue": deque(),
+    "prefetch_dir": None,
+    "prefetch_gen": 0,
+    "placeholder_tex": None,
+    "thumb_ihr": None,
+    "viewer_results": SimpleQueue(),
+    "last_full": OrderedDict(),
     "grid_table": None,
     "grid_child": None,
+    "grid_size": (0, 0),
+    "grid_top": None,
+    "grid_bottom": None,
+    "grid_slots": [],
+    "grid_cols": 1,
+    "grid_rows": 0,
+    "pending_rebuild_at": None,
+    "grid_first_row": -1,
     "texreg": "texreg",
     "frames": 0,
+    "subdir_cache": {},
+    "last_tree_key": None,
 }
 
+# decoding runs off the UI thread; textures are only created on the main thread
+_thumb_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+# bounds decoded-but-not-uploaded thumbnails held in memory
+_thumb_slots = threading.BoundedSemaphore(THUMB_MAX_INFLIGHT)
+# leaves workers free for the visible folder while neighbours are prefetched
+_prefetch_slots = threading.BoundedSemaphore(max(1, (os.cpu_count() or 4) // 2))
+# viewer loads run on their own threads and share state["last_full"]
+_full_lock = threading.Lock()
 
-def is_image_file(p: Path) -> bool:
-    return p.is_file() and p.suffix.lower() in SUPPORTED_EXT
+
+def has_image_ext(name: str) -> bool:
+    if name.endswith(_EXT_SUFFIXES):
+        return True
+    # rare mixed-case spellings like ".jPg"
+    dot = name.rfind(".")
+    return dot >= 0 and name[dot:].lower() in SUPPORTED_EXT
+
+
+def dir_key(p: Path) -> Tuple[str, int]:
+    # a directory's mtime changes whenever entries are added, removed or renamed
+    return str(p), os.stat(p).st_mtime_ns
 
 
 def list_subdirs(p: Path) -> List[Path]:
+    # one entry per path holding (mtime_ns, listing); a changed mtime replaces it
     try:
-        return sorted((x for x in p.iterdir() if x.is_dir()), key=lambda x: x.name.lower())
+        path, mtime = dir_key(p)
+        cached = state["subdir_cache"].get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with os.scandir(p) as it:
+            subs = [e.name for e in it if e.is_dir()]
     except Exception:
         return []
+    subs.sort(key=str.lower)
+    out = [p / name for name in subs]
+    state["subdir_cache"][path] = (mtime, out)
+    return out
 
 
-def list_images(p: Path) -> List[str]:
+def iter_image_batches(p: Path, first: int = SCAN_BATCH) -> Iterator[List[str]]:
+    # unsorted paths in scandir order; a small first batch gets something on screen early
+    # DirEntry.is_file() answers from the dirent type, so no stat() per entry
+    batch: List[str] = []
+    size = first
     try:
-        return [str(x) for x in sorted(p.iterdir(), key=lambda x: x.name.lower()) if is_image_file(x)]
+        with os.scandir(p) as it:
+            for e in it:
+                if has_image_ext(e.name) and e.is_file():
+                    batch.append(e.path)
+                    if len(batch) >= size:
+                        yield batch
+                        batch, size = [], SCAN_BATCH
     except Exception:
-        return []
+        pass
+    if batch:
+        yield batch
 
 
-def pil_to_dpg(image: "Image.Image") -> Tuple[int, int, List[float]]:
-    img = image.convert("RGBA")
+def list_images(p: Path) -> List[str]:
+    # all paths share the parent, so sorting paths orders by name
+    out = [x for batch in iter_image_batches(p) for x in batch]
+    out.sort(key=str.lower)
+    return out
+
+
+def scan_folder(path: str, gen: int, first: int):
+    # worker thread: stream batches to the render loop, None marks the end
+    for batch in iter_image_batches(Path(path), first):
+        if state["scan_gen"] != gen:
+            return
+        state["scan_results"].put((gen, batch))
+    state["scan_results"].put((gen, None))
+
+
+def collect_scan_results():
+    changed = False
+    while True:
+        try:
+            gen, batch = state["scan_results"].get_nowait()
+        except Empty:
+            break
+        if gen != state["scan_gen"]:
+            continue
+        if batch is None:
+            state["scanning"] = False
+            state["scan_found"].sort(key=str.lower)
+            state["images_in_dir"] = state["scan_found"]
+        else:
+            state["scan_found"].extend(batch)
+        changed = True
+    if not changed:
+        return
+    if state["scanning"]:
+        # provisional first screen: the smallest names seen so far, which later batches
+        # may still displace; a displaced decode costs at most a screenful and lands in the disk cache
+        window = state["grid_cols"] * (max(1, state["grid_rows"]) + GRID_PREFETCH_ROWS)
+        state["images_in_dir"] = heapq.nsmallest(window, state["scan_found"], key=str.lower)
+    refresh_grid_contents()
+
+
+def pil_to_dpg(image: "Image.Image") -> Tuple[int, int, np.ndarray]:
+    if image.mode == "RGBA":
+        img = image
+    elif image.mode == "RGB":
+        # adds the alpha band in place instead of converting into a new image
+        img = image
+        img.putalpha(255)
+    else:
+        img = image.convert("RGBA")
     w, h = img.size
-    data = [b / 255.0 for b in array.array("B", img.tobytes())]
+    # frombuffer is a zero-copy view of the pixel bytes; the multiply casts and scales
+    # into a single float32 allocation in one pass
+    raw = np.frombuffer(img.tobytes(), dtype=np.uint8)
+    data = np.multiply(raw, np.float32(1.0 / 255.0), dtype=np.float32)
     return w, h, data
 
 
+def thumb_cache_key(path: str) -> str:
+    st = os.stat(path)
+    return hashlib.blake2b(f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}".encode(), digest_size=16).hexdigest()
+
+
+def find_cached_thumb(key: str) -> Optional[Path]:
+    # opaque thumbs are stored as JPEG, ones with transparency as PNG
+    for ext in (".jpg", ".png"):
+        f = THUMB_CACHE_DIR / f"{key}{ext}"
+        if f.is_file():
+            return f
+    return None
+
+
+def write_cache_file(im: "Image.Image", dest: Path, fmt: str, **params):
+    # write to a temp file and rename so concurrent workers never read a partial thumbnail
+    fd, tmp = tempfile.mkstemp(dir=THUMB_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            im.save(f, fmt, **params)
+        os.replace(tmp, dest)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def has_alpha(im: "Image.Image") -> bool:
+    # most RGBA PNGs and screenshots carry a fully opaque alpha band; those can go to JPEG
+    if im.mode in ("RGBA", "LA", "PA"):
+        return im.getchannel("A").getextrema()[0] < 255
+    return "transparency" in im.info
+
+
+def load_thumb_image(path: str) -> "Image.Image":
+    # disk cache keyed by (path, mtime, size) so edited files regenerate
+    key = thumb_cache_key(path)
+    cache_file = find_cached_thumb(key)
+    if cache_file:
+        try:
+            im = Image.open(cache_file)
+            im.load()
+            return im
+        except Exception:
+            pass
+    # thumbnail() already drafts JPEGs to a reduced-scale decode (reducing_gap=2.0)
+    im = Image.open(path)
+    im.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+    try:
+        THUMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if has_alpha(im):
+            write_cache_file(im, THUMB_CACHE_DIR / f"{key}.png", "PNG")
+        else:
+            write_cache_file(im.convert("RGB"), THUMB_CACHE_DIR / f"{key}.jpg", "JPEG", quality=85, optimize=False)
+    except Exception:
+        pass
+    return im
+
+
+def decode_thumb(path: str) -> Tuple[int, int, np.ndarray]:
+    return pil_to_dpg(load_thumb_image(path))
+
+
 def thumb_for(path: str):
+    """Return the texture for path if ready, otherwise queue it for decoding."""
     if not PIL_OK:
         return None
     tex = state["thumb_tex"].get(path)
     if tex:
+        state["thumb_tex"].move_to_end(path)
         return tex
-    try:
-        from PIL import Image
-
-        im = Image.open(path)
-        im.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
-        w, h, data = pil_to_dpg(im)
+    if path not in state["thumb_pending"] and path not in state["thumb_failed"]:
+        state["thumb_queue"].append(path)
+    return None
+
+
+def submit_thumb_jobs():
+    queue = state["thumb_queue"]
+    while queue and _thumb_slots.acquire(blocking=False):
+        path = queue.popleft()
+        if path in state["thumb_tex"] or path in state["thumb_pending"]:
+            _thumb_slots.release()
+            continue
+        state["thumb_pending"][path] = _thumb_pool.submit(decode_thumb, path)
+
+
+def collect_thumb_results():
+    pending: Dict[str, Future] = state["thumb_pending"]
+    done = [p for p, fut in pending.items() if fut.done()]
+    for path in done:
+        fut = pending.pop(path)
+        _thumb_slots.release()
+        try:
+            w, h, data = fut.result()
+        except Exception:
+            # remembered so scrolling doesn't re-queue it; a visible cell switches to "Open"
+            state["thumb_failed"].add(path)
+            if path in state["thumb_buttons"]:
+                state["grid_first_row"] = -1
+            continue
         tex = dpg.add_static_texture(w, h, data, parent=state["texreg"])
         state["thumb_tex"][path] = tex
-        return tex
-    except Exception:
-        return None
+        btn = state["thumb_buttons"].get(path)
+        if btn and dpg.does_item_exist(btn):
+            dpg.configure_item(btn, texture_tag=tex)
+    if done:
+        evict_thumb_textures()
+
+
+def evict_thumb_textures():
+    # least recently used first, never a texture bound to a visible cell
+    texs = state["thumb_tex"]
+    visible = state["thumb_buttons"]
+    while len(texs) > THUMB_TEX_LIMIT:
+        for path in texs:
+            if path not in visible:
+                break
+        else:
+            return
+        dpg.delete_item(texs.pop(path))
+
+
+def prefetch_folder(path: str, gen: int):
+    # worker side: only warms the disk cache, textures are made when the folder is opened
+    for p in list_images(Path(path))[:PREFETCH_PER_FOLDER]:
+        if state["prefetch_gen"] != gen:
+            return
+        try:
+            if not find_cached_thumb(thumb_cache_key(p)):
+                load_thumb_image(p)
+        except Exception:
+            pass
+
+
+def submit_prefetch_jobs():
+    cur = state["current_dir"]
+    if state["prefetch_dir"] != cur:
+        # the sidebar folders are the ones the user is likely to open next
+        state["prefetch_dir"] = cur
+        state["prefetch_queue"] = deque(str(s) for s in list_subdirs(Path(state["root_dir"])) if str(s) != cur)
+    queue = state["prefetch_queue"]
+    while queue and _prefetch_slots.acquire(blocking=False):
+        fut = _thumb_pool.submit(prefetch_folder, queue.popleft(), state["prefetch_gen"])
+        fut.add_done_callback(lambda f: _prefetch_slots.release())
+
+
+def pump_thumbnails():
+    collect_thumb_results()
+    submit_thumb_jobs()
+    idle = not (state["scanning"] or state["thumb_queue"] or state["thumb_pending"])
+    if PIL_OK and idle:
+        submit_prefetch_jobs()
+
+
+def refresh_grid_size():
+    if state["grid_child"]:
+        state["grid_size"] = tuple(dpg.get_item_rect_size(state["grid_child"]))
+
+
+def on_grid_resize(sender, app_data, user_data):
+    old = state["grid_size"]
+    refresh_grid_size()
+    if state["grid_size"] != old:
+        state["pending_rebuild_at"] = time.monotonic() + RESIZE_DEBOUNCE_S
 
 
 def available_grid_width() -> int:
-    if not state["grid_child"]:
-        return 800
-    w = dpg.get_item_rect_size(state["grid_child"])[0]
+    w = state["grid_size"][0]
     return w if w > 0 else 800
 
 
@@ -89,6 +375,24 @@ def compute_columns(avail_w: int) -> int:
     return max(1, avail_w // (THUMB_SIZE + THUMB_PADDING))
 
 
+def screen_size() -> Tuple[int, int]:
+    if sys.platform.startswith("win"):
+        import ctypes
+
+        user32 = ctypes.windll.user32
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+    try:
+        import tkinter
+
+        root = tkinter.Tk()
+        root.withdraw()
+        size = root.winfo_screenwidth(), root.winfo_screenheight()
+        root.destroy()
+        return size
+    except Exception:
+        return 1920, 1080
+
+
 def open_system_viewer(image_path: str):
     if sys.platform.startswith("win"):
         os.startfile(image_path)
@@ -98,11 +402,71 @@ def open_system_viewer(image_path: str):
         subprocess.Popen(["xdg-open", image_path])
 
 
-def launch_viewer(image_path: str):
+def decode_full(path: str) -> Tuple[int, int, np.ndarray]:
+    # reopening a recently viewed image skips the decode and resample
+    key = (path, os.stat(path).st_mtime_ns)
+    cache = state["last_full"]
+    with _full_lock:
+        im = cache.get(key)
+        if im is not None:
+            cache.move_to_end(key)
+    if im is None:
+        im = Image.open(path)
+        im.thumbnail(VIEWER_MAX_SIZE, Image.LANCZOS)
+        # stored as RGBA so pil_to_dpg never mutates a shared image
+        if im.mode != "RGBA":
+            im = im.convert("RGBA")
+        with _full_lock:
+            cache[key] = im
+            # no close(): another viewer thread may still be converting the evicted image,
+            # and an in-memory convert() result is freed by refcounting anyway
+            while len(cache) > FULL_CACHE_SIZE:
+                cache.popitem(last=False)
+    return pil_to_dpg(im)
+
+
+def _load_full_res(path: str, win, img):
     try:
-        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--view", image_path], close_fds=True)
+        result = decode_full(path)
     except Exception:
+        result = None
+    state["viewer_results"].put((path, win, img, result))
+
+
+def on_viewer_close(sender, app_data, user_data):
+    dpg.delete_item(sender)
+    tex = user_data
+    if tex and dpg.does_item_exist(tex):
+        dpg.delete_item(tex)
+
+
+def launch_viewer(image_path: str):
+    if not PIL_OK:
         open_system_viewer(image_path)
+        return
+    # open a window in this context right away, previewing the thumbnail if we have it
+    tex = state["thumb_tex"].get(image_path) or state["placeholder_tex"]
+    with dpg.window(label=os.path.basename(image_path), pos=(40, 40), on_close=on_viewer_close) as win:
+        img = dpg.add_image(tex, width=THUMB_SIZE, height=THUMB_SIZE)
+    threading.Thread(target=_load_full_res, args=(image_path, win, img), daemon=True).start()
+
+
+def collect_viewer_results():
+    while True:
+        try:
+            path, win, img, result = state["viewer_results"].get_nowait()
+        except Empty:
+            return
+        if not dpg.does_item_exist(win):
+            continue
+        if result is None:
+            dpg.delete_item(win)
+            open_system_viewer(path)
+            continue
+        w, h, data = result
+        tex = dpg.add_static_texture(w, h, data, parent=state["texreg"])
+        dpg.configure_item(img, texture_tag=tex, width=w, height=h)
+        dpg.configure_item(win, width=min(w + 40, 1800) - 20, height=min(h + 100, 1200) - 60, user_data=tex)
 
 
 def on_choose_root():
@@ -127,54 +491,96 @@ def on_open_in_explorer():
 
 def on_folder_click(sender, app_data, user_data):
     load_directory_images(user_data)
-    build_thumbnail_grid()
 
 
 def on_thumb_double(sender, app_data, user_data):
-    # launch separate process (another DPG instance) for full-size view
-    launch_viewer(user_data)
+    # shared handler: app_data is (mouse button, clicked item); the path lives on the button
+    path = dpg.get_item_user_data(app_data[1])
+    if path:
+        launch_viewer(path)
 
 
 def set_root_directory(path: str):
     state["root_dir"] = path
     load_directory_images(path)
     rebuild_sidebar_tree()
-    build_thumbnail_grid()
 
 
 def load_directory_images(path: str):
     state["current_dir"] = path
-    state["images_in_dir"] = list_images(Path(path))
+    # stop in-flight prefetch so the new folder gets the workers
+    state["prefetch_gen"] += 1
+    state["prefetch_queue"].clear()
+    state["prefetch_dir"] = None
+    # reopening a folder retries images that failed before
+    state["thumb_failed"].clear()
+    # list in the background; collect_scan_results fills the grid as batches arrive
+    state["images_in_dir"] = []
+    state["scan_found"] = []
+    state["scan_gen"] += 1
+    state["scanning"] = True
+    first = compute_columns(available_grid_width()) * visible_row_count()
+    threading.Thread(target=scan_folder, args=(path, state["scan_gen"], first), daemon=True).start()
+    if state["grid_child"]:
+        dpg.set_y_scroll(state["grid_child"], 0)
     dpg.set_value("path_label", path)
+    # empty grid with the "Scanning…" message until the first batch lands
+    build_thumbnail_grid()
 
 
 def rebuild_sidebar_tree():
+    root = Path(state["root_dir"])
+    try:
+        key = dir_key(root)
+    except Exception:
+        key = None
+    if key is not None and key == state["last_tree_key"]:
+        return
+    state["last_tree_key"] = key
     try:
-        dpg.configure_item("sidebar_tree", label=Path(state["root_dir"]).name)
+        dpg.configure_item("sidebar_tree", label=root.name)
     except Exception:
         pass
     kids = dpg.get_item_children("sidebar_tree", 1) or []
     for ch in kids:
         dpg.delete_item(ch)
-    root = Path(state["root_dir"])
     for sub in list_subdirs(root):
         nid = dpg.add_tree_node(label=sub.name, parent="sidebar_tree", default_open=False, leaf=False)
         dpg.add_button(label="Open folder", parent=nid, user_data=str(sub), callback=on_folder_click)
 
 
 def clear_grid_items():
-    for it in state["thumb_items"]:
-        if dpg.does_item_exist(it):
-            dpg.delete_item(it)
-    state["thumb_items"].clear()
-    if state["grid_table"] and dpg.does_item_exist(state["grid_table"]):
-        dpg.delete_item(state["grid_table"])
-        state["grid_table"] = None
+    state["thumb_buttons"].clear()
+    state["thumb_queue"].clear()
+    state["grid_slots"].clear()
+    state["grid_first_row"] = -1
+    # deleting the table frees its rows, cells and buttons in one call
+    for key in ("grid_table", "grid_top", "grid_bottom"):
+        item = state[key]
+        if item and dpg.does_item_exist(item):
+            dpg.delete_item(item)
+        state[key] = None
+
+
+def visible_row_count() -> int:
+    h = state["grid_size"][1]
+    h = h if h > 0 else 800
+    # one extra row for each partially visible edge
+    return h // GRID_ROW_HEIGHT + 2
 
 
 def build_thumbnail_grid():
     clear_grid_items()
+    # the top spacer must be the first item so row math can treat y_scroll as table rows
+    if dpg.does_item_exist("grid_loading"):
+        dpg.delete_item("grid_loading")
     cols = compute_columns(available_grid_width())
+    state["grid_cols"] = cols
+    state["grid_rows"] = visible_row_count()
+    imgs = state["images_in_dir"]
+    # spacers stand in for the rows above/below the window so the scrollbar covers the whole folder
+    top = dpg.add_spacer(height=0, parent=state["grid_child"])
+    state["grid_top"] = top
     with dpg.table(
         header_row=False,
         resizable=False,
@@ -189,31 +595,97 @@ def build_thumbnail_grid():
         state["grid_table"] = table_id
         for _ in range(cols):
             dpg.add_table_column(init_width_or_weight=float(THUMB_SIZE + THUMB_PADDING))
-        imgs = state["images_in_dir"]
         if not imgs:
             with dpg.table_row(parent=table_id):
                 with dpg.table_cell():
-                    msg = "No images in this folder." if PIL_OK else "Pillow not installed. Thumbs disabled."
-                    state["thumb_items"].append(dpg.add_text(msg))
+                    if state["scanning"]:
+                        msg = "Scanning…"
+                    else:
+                        msg = "No images in this folder." if PIL_OK else "Pillow not installed. Thumbs disabled."
+                    dpg.add_text(msg)
         else:
-            row = None
-            for i, p in enumerate(imgs):
-                if i % cols == 0:
-                    row = dpg.add_table_row(parent=table_id)
-                with dpg.table_cell(parent=row):
-                    tex = thumb_for(p)
-                    with dpg.group(horizontal=False) as g:
-                        if tex:
-                            btn = dpg.add_image_button(texture_tag=tex, width=THUMB_SIZE, height=THUMB_SIZE)
-                        else:
-                            btn = dpg.add_button(label="Open", width=THUMB_SIZE, height=THUMB_SIZE)
-                        # per-item handler registry for double-click
-                        ihr = dpg.add_item_handler_registry()
-                        dpg.add_item_double_clicked_handler(parent=ihr, user_data=p, callback=on_thumb_double)
-                        dpg.bind_item_handler_registry(btn, ihr)
-                        state["thumb_items"].append(ihr)
-                        dpg.add_text(os.path.basename(p))
-                        state["thumb_items"].append(g)
+            # fixed pool of widgets for the visible window; update_visible_rows rebinds them on scroll
+            total_rows = (len(imgs) + cols - 1) // cols
+            for _ in range(min(state["grid_rows"], total_rows)):
+                row = dpg.add_table_row(parent=table_id, height=GRID_ROW_HEIGHT)
+                for _ in range(cols):
+                    with dpg.table_cell(parent=row):
+                        with dpg.group(horizontal=False) as g:
+                            # plain "Open" button doubles as the fallback for images that fail to decode
+                            fb = dpg.add_button(label="Open", width=THUMB_SIZE, height=THUMB_SIZE, show=not PIL_OK)
+                            dpg.bind_item_handler_registry(fb, state["thumb_ihr"])
+                            if PIL_OK:
+                                btn = dpg.add_image_button(texture_tag=state["placeholder_tex"], width=THUMB_SIZE, height=THUMB_SIZE)
+                                dpg.bind_item_handler_registry(btn, state["thumb_ihr"])
+                            else:
+                                btn = fb
+                            txt = dpg.add_text("")
+                    state["grid_slots"].append((g, btn, fb, txt))
+    bottom = dpg.add_spacer(height=0, parent=state["grid_child"])
+    state["grid_bottom"] = bottom
+    update_visible_rows()
+
+
+def grid_layout_changed() -> bool:
+    # the widget pool only depends on column and row counts, not the exact pixel size
+    return compute_columns(available_grid_width()) != state["grid_cols"] or visible_row_count() != state["grid_rows"]
+
+
+def refresh_grid_contents():
+    # rebuild only when the widget pool is too small, otherwise just rebind it
+    imgs = state["images_in_dir"]
+    cols = state["grid_cols"]
+    needed = min(state["grid_rows"], (len(imgs) + cols - 1) // cols) * cols
+    if not state["grid_slots"] or len(state["grid_slots"]) < needed:
+        build_thumbnail_grid()
+    else:
+        state["grid_first_row"] = -1
+        update_visible_rows()
+
+
+def update_visible_rows():
+    slots = state["grid_slots"]
+    if not slots:
+        return
+    imgs = state["images_in_dir"]
+    cols = state["grid_cols"]
+    total_rows = (len(imgs) + cols - 1) // cols
+    pool_rows = len(slots) // cols
+    first = int(dpg.get_y_scroll(state["grid_child"]) // GRID_ROW_HEIGHT)
+    first = max(0, min(first, total_rows - pool_rows))
+    if first == state["grid_first_row"]:
+        return
+    state["grid_first_row"] = first
+    dpg.configure_item(state["grid_top"], height=first * GRID_ROW_HEIGHT)
+    dpg.configure_item(state["grid_bottom"], height=max(0, total_rows - first - pool_rows) * GRID_ROW_HEIGHT)
+    # only the window (plus prefetch) gets decoded, nearest rows first
+    state["thumb_buttons"].clear()
+    state["thumb_queue"].clear()
+    base = first * cols
+    for i, (g, btn, fb, txt) in enumerate(slots):
+        idx = base + i
+        if idx >= len(imgs):
+            dpg.configure_item(g, show=False)
+            continue
+        p = imgs[idx]
+        dpg.configure_item(g, show=True)
+        dpg.configure_item(btn, user_data=p)
+        dpg.configure_item(fb, user_data=p)
+        dpg.set_value(txt, os.path.basename(p))
+        if PIL_OK:
+            failed = p in state["thumb_failed"]
+            dpg.configure_item(btn, show=not failed)
+            dpg.configure_item(fb, show=failed)
+            if failed:
+                continue
+            tex = thumb_for(p)
+            dpg.configure_item(btn, texture_tag=tex or state["placeholder_tex"])
+            # every visible button: placeholders get swapped, and eviction skips these
+            state["thumb_buttons"][p] = btn
+    end = base + len(slots)
+    for p in imgs[end:end + GRID_PREFETCH_ROWS * cols]:
+        thumb_for(p)
+
 
 def resize_callback(sender, app_data):
     try:
@@ -221,11 +693,17 @@ def resize_callback(sender, app_data):
     except Exception:
         return
     dpg.configure_item("main_window", width=width, height=height - 30)
-    build_thumbnail_grid()
+    # coalesce drag-resize events; the render loop rebuilds once they stop
+    state["pending_rebuild_at"] = time.monotonic() + RESIZE_DEBOUNCE_S
 
 def build_ui():
     with dpg.texture_registry(show=False, tag=state["texreg"]):
-        pass
+        blank = np.full(THUMB_SIZE * THUMB_SIZE * 4, 0.2, dtype=np.float32)
+        state["placeholder_tex"] = dpg.add_static_texture(THUMB_SIZE, THUMB_SIZE, blank)
+    # one double-click handler shared by every thumbnail button
+    with dpg.item_handler_registry() as ihr:
+        dpg.add_item_double_clicked_handler(callback=on_thumb_double)
+    state["thumb_ihr"] = ihr
     with dpg.window(label="Image Browser", tag="main_window", width=900, height=820, no_scrollbar=True):
         with dpg.group(horizontal=True):
             dpg.add_button(label="Choose Root…", callback=on_choose_root)
@@ -244,7 +722,11 @@ def build_ui():
                     dpg.add_tree_node(label="Root", tag="sidebar_tree", default_open=True)
             with dpg.child_window(height=-1, border=True, tag="grid_child") as gc:
                 state["grid_child"] = gc
-                dpg.add_text("Loading…")
+                dpg.add_text("Loading…", tag="grid_loading")
+            # size is pushed to us on change rather than polled every frame
+            with dpg.item_handler_registry() as grid_ihr:
+                dpg.add_item_resize_handler(callback=on_grid_resize)
+            dpg.bind_item_handler_registry(gc, grid_ihr)
     with dpg.file_dialog(directory_selector=True, show=False, callback=on_dir_chosen, tag="dir_dialog", modal=True, width=700, height=400):
         dpg.add_file_extension("", color=(0, 0, 0, 255))
     set_root_directory(state["root_dir"])
@@ -256,11 +738,7 @@ def viewer_mode(image_path: str):
         return
     dpg.create_context()
     try:
-        from PIL import Image
-
-        im = Image.open(image_path)
-        im.thumbnail((1600, 1000), Image.LANCZOS)
-        w, h, data = pil_to_dpg(im)
+        w, h, data = decode_full(image_path)
         with dpg.texture_registry(show=False):
             tex = dpg.add_static_texture(w, h, data)
     except Exception:
@@ -287,10 +765,12 @@ if __name__ == "__main__":
 
     # Main app
     dpg.create_context()
+    # callbacks run inside the render loop below, so the grid and scan results
+    # are only ever touched from this thread
+    dpg.configure_app(manual_callback_management=True)
     build_ui()
 
-    screen_width = GetSystemMetrics(0)
-    screen_height = GetSystemMetrics(1)
+    screen_width, screen_height = screen_size()
     vw = max(800, screen_width - 260)
     vh = max(600, screen_height - 30)
 
@@ -303,19 +783,34 @@ if __name__ == "__main__":
     resize_callback(None, [vw, vh])
 
     # render loop
-    last_w = 0
     last_title = 0
     while dpg.is_dearpygui_running():
         state["frames"] += 1
-        dpg.set_value("frame_label", str(state["frames"]))
+        dpg.run_callbacks(dpg.get_callback_queue())
+        pump_thumbnails()
+        collect_viewer_results()
+        collect_scan_results()
+        # counter widgets are refreshed together every 10 frames, not every frame
         if state["frames"] - last_title >= 10:
-            dpg.set_viewport_title(f"Image Browser — frames: {state['frames']}")
+            frames = str(state["frames"])
+            dpg.set_value("frame_label", frames)
+            dpg.set_viewport_title(f"Image Browser — frames: {frames}")
             last_title = state["frames"]
         if state["grid_child"]:
-            gw = dpg.get_item_rect_size(state["grid_child"])[0]
-            if gw and gw != last_w:
-                last_w = gw
-                build_thumbnail_grid()
+            due = state["pending_rebuild_at"]
+            if due is not None:
+                if time.monotonic() >= due:
+                    state["pending_rebuild_at"] = None
+                    refresh_grid_size()
+                    if grid_layout_changed():
+                        build_thumbnail_grid()
+            update_visible_rows()
         dpg.render_dearpygui_frame()
 
+    # running prefetch and scan jobs check their generation and stop; the exit hook
+    # joins pool workers, so an unfinished prefetch would otherwise hold the process open
+    state["prefetch_gen"] += 1
+    state["scan_gen"] += 1
+    state["prefetch_queue"].clear()
+    _thumb_pool.shutdown(wait=False, cancel_futures=True)
     dpg.destroy_context()